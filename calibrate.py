@@ -0,0 +1,21 @@
+from modules.calibration import calibrate_ca_model
+from modules.preprocessing import load_precomputed_grids
+
+# Checkpoint kalibrasi, dipakai ulang bila proses sebelumnya terhenti
+checkpoint_path = "data/calibration_checkpoint.json"
+
+if __name__ == "__main__":
+    precomputed_grids = load_precomputed_grids()
+
+    print("🔍 Kalibrasi threshold, radius, dan horizon dari data historis...")
+    ranked = calibrate_ca_model(precomputed_grids, checkpoint_path=checkpoint_path)
+
+    print(f"{'Rank':>4} {'Threshold':>9} {'Radius':>6} {'Horizon':>7} {'Error':>12}  Status")
+    for row in ranked:
+        # Tampilkan 5 parameter terbaik untuk setiap horizon
+        if row["rank"] > 5:
+            continue
+        print(
+            f"{row['rank']:>4} {row['threshold']:>9} {row['radius']:>6} "
+            f"{row['horizon']:>7} {row['error']:>12.1f}  {row['status']}"
+        )
@@ -4,20 +4,28 @@ import numpy as np
 from scipy.ndimage import convolve
 import streamlit as st
 
-def run_ca_model(grid, threshold=5):
+def moore_kernel(radius=1):
+    """
+    Membuat kernel tetangga Moore berukuran (2*radius+1)^2 tanpa sel pusat.
+    radius=1 menghasilkan kernel 3x3 klasik (8 tetangga).
+    """
+    size = 2 * radius + 1
+    kernel = np.ones((size, size), dtype=np.int32)
+    kernel[radius, radius] = 0
+    return kernel
+
+
+def run_ca_model(grid, threshold=5, radius=1):
     """
     Menjalankan simulasi CA satu langkah untuk prediksi permukiman.
     Jika sebuah sel kosong (0) memiliki tetangga terbangun (1) ≥ threshold, maka menjadi 1.
+    Tetangga dihitung dalam jendela Moore dengan jari-jari `radius`.
     """
-    # Kernel tetangga Moore 3x3 (tidak termasuk diri sendiri)
-    kernel = np.array([
-        [1, 1, 1],
-        [1, 0, 1],
-        [1, 1, 1]
-    ])
+    kernel = moore_kernel(radius)
 
     # Hitung jumlah tetangga yang sudah terbangun
-    neighbors = convolve(grid, kernel, mode='constant', cval=0)
+    # (output int32 agar tidak overflow pada grid uint8 dengan radius besar)
+    neighbors = convolve(grid, kernel, output=np.int32, mode='constant', cval=0)
 
     # Aturan pertumbuhan CA: hanya untuk sel kosong (0) dengan tetangga ≥ threshold
     growth = (grid == 0) & (neighbors >= threshold)
@@ -48,7 +56,7 @@ def learn_threshold_from_history(precomputed_grids):
                 continue
 
             pred = run_ca_model(grid_start, threshold=t)
-            error = np.sum(np.abs(pred - grid_target))  # Total sel yang salah
+            error = np.count_nonzero(pred != grid_target)  # Total sel yang salah
             total_error += error
 
         total_errors[t] = total_error
@@ -60,11 +68,11 @@ def learn_threshold_from_history(precomputed_grids):
 
 
 @st.cache_data
-def run_ca_model_multistep(initial_grid, threshold, steps):
+def run_ca_model_multistep(initial_grid, threshold, steps, radius=1):
     """
     Menjalankan CA untuk beberapa tahun ke depan (steps kali).
     """
     current = initial_grid.copy()
     for _ in range(steps):
-        current = run_ca_model(current, threshold)
-    return current
\ No newline at end of file
+        current = run_ca_model(current, threshold, radius)
+    return current
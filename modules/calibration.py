@@ -0,0 +1,259 @@
+# modules/calibration.py
+
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from modules.ca_model import run_ca_model
+
+# State milik setiap proses worker (diisi oleh _init_worker)
+_worker_shm = None
+_worker_grids = None
+_worker_years = None
+_worker_bounds = None
+
+
+def _init_worker(shm_name, shape, dtype, years, bounds):
+    """
+    Menempelkan worker ke shared memory berisi grid historis,
+    sehingga grid tidak perlu di-pickle ulang untuk setiap kandidat.
+    """
+    global _worker_shm, _worker_grids, _worker_years, _worker_bounds
+    _worker_shm = SharedMemory(name=shm_name)
+    _worker_grids = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf)
+    _worker_years = years
+    _worker_bounds = bounds
+
+
+def _hindcast_pairs(years, horizon):
+    """
+    Pasangan (indeks awal, indeks target) untuk hindcast sejauh `horizon` tahun.
+    """
+    index = {year: i for i, year in enumerate(years)}
+    return [
+        (index[year], index[year + horizon])
+        for year in years
+        if year + horizon in index
+    ]
+
+
+def _evaluate_candidate(threshold, radius, horizons):
+    """
+    Menghitung error hindcast untuk satu pasangan (threshold, radius)
+    pada semua horizon sekaligus. Lintasan CA dari setiap tahun awal dipakai
+    bersama oleh semua horizon, lalu horizon yang error parsialnya sudah
+    melebihi batas top-k horizon tersebut dipangkas lebih awal.
+    """
+    grids, years = _worker_grids, _worker_years
+    pairs = {h: _hindcast_pairs(years, h) for h in horizons}
+    partial = {h: 0 for h in horizons}
+    evaluated = {h: 0 for h in horizons}
+    alive = set(horizons)
+    pruned = set()
+
+    for start in range(len(years)):
+        targets = {
+            h: end for h in alive for s, end in pairs[h] if s == start
+        }
+        if not targets:
+            continue
+
+        current = grids[start]
+        for step in range(1, max(targets) + 1):
+            current = run_ca_model(current, threshold, radius)
+            if step not in targets:
+                continue
+
+            partial[step] += int(np.count_nonzero(current != grids[targets[step]]))
+            evaluated[step] += 1
+            if evaluated[step] == len(pairs[step]):
+                # Semua pasangan sudah dihitung, error sudah final
+                alive.discard(step)
+                if not alive:
+                    break
+                continue
+
+            # Error rata-rata minimum yang masih mungkin dicapai sudah lebih
+            # buruk dari batas top-k horizon ini, jadi tidak perlu diteruskan
+            bound = _worker_bounds[horizons.index(step)]
+            if partial[step] > bound * len(pairs[step]):
+                alive.discard(step)
+                pruned.add(step)
+                if not alive:
+                    break
+
+        if not alive:
+            break
+
+    rows = []
+    for h in horizons:
+        rows.append({
+            "threshold": threshold,
+            "radius": radius,
+            "horizon": h,
+            "pairs": len(pairs[h]),
+            "error": partial[h] / len(pairs[h]),
+            "status": "pruned" if h in pruned else "complete",
+        })
+    return rows
+
+
+def _kth_best_error(results, horizon, top_k):
+    """
+    Batas pemangkasan satu horizon: error ke-k terbaik dari kandidat
+    yang sudah selesai pada horizon tersebut.
+    """
+    errors = sorted(
+        r["error"] for r in results
+        if r["horizon"] == horizon and r["status"] == "complete"
+    )
+    if len(errors) < top_k:
+        return math.inf
+    return errors[top_k - 1]
+
+
+def _checkpoint_signature(years, stacked, candidates, horizons, top_k):
+    """
+    Sidik data grid dan pengaturan pencarian, agar checkpoint dari data
+    atau ruang parameter yang berbeda tidak dipakai ulang.
+    """
+    return {
+        "years": list(years),
+        "shape": list(stacked.shape),
+        "built_cells": [int(np.count_nonzero(g)) for g in stacked],
+        "candidates": [list(c) for c in candidates],
+        "horizons": list(horizons),
+        "top_k": top_k,
+    }
+
+
+def _load_checkpoint(path, signature):
+    if not path or not os.path.exists(path):
+        return []
+
+    with open(path) as f:
+        data = json.load(f)
+
+    if data.get("signature") != signature:
+        print("⚠️ Checkpoint tidak cocok dengan data grid atau pengaturan, kalibrasi diulang dari awal.")
+        return []
+    return data.get("results", [])
+
+
+def _save_checkpoint(path, signature, results):
+    if not path:
+        return
+
+    # Tulis ke file sementara dulu agar checkpoint tidak rusak bila proses terhenti
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"signature": signature, "results": results}, f)
+    os.replace(tmp_path, path)
+
+
+def _rank_results(results):
+    """
+    Mengurutkan hasil per horizon: kandidat selesai berdasarkan error terkecil,
+    kandidat yang dipangkas diletakkan di bawah. Rank dihitung ulang per horizon.
+    """
+    ranked = sorted(
+        results,
+        key=lambda r: (r["horizon"], r["status"] != "complete", r["error"], r["radius"], r["threshold"]),
+    )
+    rank, horizon = 0, None
+    for row in ranked:
+        if row["horizon"] != horizon:
+            rank, horizon = 0, row["horizon"]
+        rank += 1
+        row["rank"] = rank
+    return ranked
+
+
+def calibrate_ca_model(
+    precomputed_grids,
+    thresholds=None,
+    radii=(1, 2, 3),
+    horizons=(1, 2, 3),
+    top_k=10,
+    max_workers=None,
+    checkpoint_path=None,
+):
+    """
+    Kalibrasi CA dengan grid search paralel atas threshold, radius tetangga,
+    dan horizon hindcast multi-langkah berdasarkan data grid historis.
+
+    - Grid historis dibagikan ke worker lewat shared memory.
+    - Kandidat yang error parsialnya sudah melebihi error ke-`top_k` terbaik
+      pada horizon yang sama dipangkas lebih awal (status "pruned", error
+      berupa batas bawah).
+    - Bila `checkpoint_path` diberikan, hasil disimpan setiap kandidat selesai
+      dan kalibrasi yang terhenti dengan pengaturan yang sama dapat dilanjutkan.
+
+    Error adalah rata-rata jumlah sel yang salah per pasangan tahun, sehingga
+    hanya sebanding antar kandidat dengan horizon yang sama.
+    Return: list of dict terurut per horizon lalu rank
+    (rank, threshold, radius, horizon, pairs, error, status).
+    """
+    years = sorted(y for y, g in precomputed_grids.items() if g is not None)
+    horizons = tuple(h for h in sorted(set(horizons)) if _hindcast_pairs(years, h))
+    if not horizons:
+        raise ValueError("Tidak ada pasangan tahun historis untuk horizon yang diminta.")
+
+    candidates = [
+        (t, r)
+        for r in radii
+        for t in (thresholds or range(1, (2 * r + 1) ** 2))
+    ]
+
+    stacked = np.stack([precomputed_grids[y] for y in years])
+    signature = _checkpoint_signature(years, stacked, candidates, horizons, top_k)
+
+    results = _load_checkpoint(checkpoint_path, signature)
+    done = {(r["threshold"], r["radius"], r["horizon"]) for r in results}
+    pending = [
+        (t, r) for t, r in candidates
+        if any((t, r, h) not in done for h in horizons)
+    ]
+
+    if pending:
+        ctx = get_context()
+        bounds = ctx.Array("d", [_kth_best_error(results, h, top_k) for h in horizons])
+        shm = SharedMemory(create=True, size=stacked.nbytes)
+        shared = None
+        try:
+            shared = np.ndarray(stacked.shape, dtype=stacked.dtype, buffer=shm.buf)
+            shared[:] = stacked
+
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(shm.name, stacked.shape, stacked.dtype, years, bounds),
+            ) as executor:
+                futures = [
+                    executor.submit(_evaluate_candidate, t, r, horizons)
+                    for t, r in pending
+                ]
+                for future in as_completed(futures):
+                    rows = [
+                        row for row in future.result()
+                        if (row["threshold"], row["radius"], row["horizon"]) not in done
+                    ]
+                    results.extend(rows)
+
+                    with bounds.get_lock():
+                        for i, h in enumerate(horizons):
+                            bounds[i] = _kth_best_error(results, h, top_k)
+                    _save_checkpoint(checkpoint_path, signature, results)
+        finally:
+            # Lepas view numpy sebelum menutup shared memory
+            shared = None
+            shm.close()
+            shm.unlink()
+
+    return _rank_results(results)
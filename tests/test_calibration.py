@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+from scipy.ndimage import convolve
+
+from modules.ca_model import moore_kernel, run_ca_model
+from modules.calibration import calibrate_ca_model
+
+# Tanpa pemangkasan: batas top-k tidak pernah terisi
+NO_PRUNING = 10**6
+
+
+def make_grids(size=16, years=range(2020, 2025), seed=0):
+    """
+    Grid sintetis kecil: permukiman awal acak yang bertambah setiap tahun.
+    """
+    rng = np.random.default_rng(seed)
+    grid = (rng.random((size, size)) < 0.2).astype(np.uint8)
+    grids = {}
+    for year in years:
+        grids[year] = grid.copy()
+        grid = grid | (rng.random((size, size)) < 0.08).astype(np.uint8)
+    return grids
+
+
+def top_k_by_horizon(table, k):
+    return {
+        h: [
+            (r["threshold"], r["radius"], r["error"])
+            for r in table
+            if r["horizon"] == h and r["rank"] <= k
+        ]
+        for h in {r["horizon"] for r in table}
+    }
+
+
+def test_pruning_keeps_top_k_per_horizon():
+    grids = make_grids()
+    settings = dict(radii=(1, 2), horizons=(1, 2, 3), max_workers=2)
+
+    pruned = calibrate_ca_model(grids, top_k=3, **settings)
+    full = calibrate_ca_model(grids, top_k=NO_PRUNING, **settings)
+
+    assert all(r["status"] == "complete" for r in full)
+    assert top_k_by_horizon(pruned, 3) == top_k_by_horizon(full, 3)
+    for row in pruned:
+        if row["rank"] <= 3:
+            assert row["status"] == "complete"
+
+
+def test_resume_from_partial_checkpoint(tmp_path):
+    grids = make_grids()
+    settings = dict(radii=(1, 2), horizons=(1, 2), top_k=NO_PRUNING, max_workers=2)
+    checkpoint = tmp_path / "checkpoint.json"
+
+    fresh = calibrate_ca_model(grids, **settings)
+    calibrate_ca_model(grids, checkpoint_path=str(checkpoint), **settings)
+
+    # Simulasikan proses yang terhenti di tengah jalan
+    data = json.loads(checkpoint.read_text())
+    data["results"] = data["results"][: len(data["results"]) // 2]
+    checkpoint.write_text(json.dumps(data))
+
+    resumed = calibrate_ca_model(grids, checkpoint_path=str(checkpoint), **settings)
+
+    assert resumed == fresh
+
+
+def test_checkpoint_from_other_settings_is_ignored(tmp_path):
+    grids = make_grids()
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    calibrate_ca_model(grids, radii=(1, 2), horizons=(1,), checkpoint_path=checkpoint, max_workers=2)
+    table = calibrate_ca_model(grids, radii=(1,), horizons=(1,), checkpoint_path=checkpoint, max_workers=2)
+
+    assert {r["radius"] for r in table} == {1}
+    assert len(table) == 8
+
+
+def test_moore_kernel_neighbor_counts():
+    rng = np.random.default_rng(1)
+    grid = (rng.random((9, 9)) < 0.4).astype(np.uint8)
+
+    for radius in (1, 2, 3):
+        kernel = moore_kernel(radius)
+        assert kernel.shape == (2 * radius + 1, 2 * radius + 1)
+        assert kernel.sum() == (2 * radius + 1) ** 2 - 1
+
+        neighbors = convolve(grid, kernel, output=np.int32, mode="constant", cval=0)
+        padded = np.pad(grid.astype(np.int32), radius)
+        for i in range(grid.shape[0]):
+            for j in range(grid.shape[1]):
+                window = padded[i:i + 2 * radius + 1, j:j + 2 * radius + 1]
+                assert neighbors[i, j] == window.sum() - grid[i, j]
+
+
+def test_run_ca_model_radius_two_spreads_two_cells():
+    grid = np.zeros((7, 7), dtype=np.uint8)
+    grid[3, 3] = 1
+
+    result = run_ca_model(grid, threshold=1, radius=2)
+
+    expected = np.zeros((7, 7), dtype=np.uint8)
+    expected[1:6, 1:6] = 1
+    assert np.array_equal(result, expected)